@@ -3,6 +3,8 @@ import pandas as pd
 import mysql.connector
 import os
 
+from velocity import DEFAULT_RETENTION_HOURS, ENTITY_COLUMNS, VelocityIndex, coerce_entity
+
 # Page configuration
 st.set_page_config(page_title="Credit Card Fraud Detection", layout="wide")
 
@@ -31,6 +33,13 @@ with st.spinner("Loading data from MySQL..."):
     df = load_data()
     st.success("Data loaded successfully!")
 
+# Build the per-entity time index once per entity column
+@st.cache_resource(show_spinner=True)
+def load_velocity_index(entity_col, _df):
+    return VelocityIndex.from_frame(_df, entity_col)
+
+all_df = df
+
 # Display filters
 st.sidebar.header("🔍 Filter Options")
 fraud_filter = st.sidebar.selectbox("Show", ["All", "Fraud", "Non-Fraud"])
@@ -52,6 +61,32 @@ col2.metric("Non-Fraud Count", int((df["is_fraud"] == 0).sum()))
 st.subheader("🧾 Data Preview")
 st.dataframe(df.head(100))
 
+# Velocity lookup: recent activity for a card / merchant / state
+st.subheader("⏱️ Velocity Lookup")
+entity_columns = [c for c in ENTITY_COLUMNS if c in all_df.columns]
+if entity_columns:
+    col1, col2, col3 = st.columns(3)
+    entity_col = col1.selectbox("Entity", entity_columns)
+    entity_value = col2.text_input(f"{entity_col} value")
+    window_hours = col3.number_input("Window (hours)", min_value=1, max_value=DEFAULT_RETENTION_HOURS,
+                                     value=24, step=1)
+
+    if entity_value:
+        try:
+            index = load_velocity_index(entity_col, all_df)
+            key = coerce_entity(entity_value, all_df[entity_col].dtype)
+            count, amount, rows = index.window(key, window_hours)
+        except Exception as e:
+            st.error(f"Velocity lookup failed: {e}")
+        else:
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Transactions", count)
+            m2.metric("Total Amount", f"{amount:,.2f}")
+            m3.metric("Per Hour", f"{count / window_hours:.2f}")
+            st.dataframe(all_df.iloc[rows])
+else:
+    st.info("No card, merchant or state columns available for velocity lookup.")
+
 # Optional: Show raw data toggle
 if st.checkbox("Show full dataset"):
     st.dataframe(df)
@@ -6,6 +6,10 @@ import plotly.express as px
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+import shared_state
+from rules import PrefilterStats, calibrate_rules, compile_rules, load_rules, score_with_rules
+from shadow import ShadowEvaluator, load_shadow_models
+
 # Set page config
 st.set_page_config(page_title="💳 Credit Card Fraud Detection", layout="wide")
 
@@ -61,10 +65,12 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Load model and features with caching
-@st.cache_data
+# Load model and features once per process and share them across sessions
+@st.cache_resource
 def load_model_and_features():
     try:
+        if shared_state.SHARED_STATE_DIR:
+            return shared_state.load_model(shared_state.SHARED_STATE_DIR)
         model = joblib.load("fraud_model.pkl")
         features = joblib.load("model_features.pkl")
         return model, features
@@ -74,16 +80,76 @@ def load_model_and_features():
 
 model, features = load_model_and_features()
 
-# Load dataset for exploration
-@st.cache_data
+# Challenger models scored in the background alongside the champion
+@st.cache_resource
+def load_shadow_evaluator():
+    try:
+        return ShadowEvaluator(load_shadow_models())
+    except Exception as e:
+        st.warning(f"Shadow models disabled: {e}")
+        return ShadowEvaluator({})
+
+shadow_evaluator = load_shadow_evaluator()
+
+# Load dataset for exploration (memory-mapped and read-only in shared mode)
+@st.cache_resource
 def load_data():
+    if shared_state.SHARED_STATE_DIR:
+        return shared_state.load_data(shared_state.SHARED_STATE_DIR)
     df = pd.read_csv("processed_fraud_data_single.csv")
     return df
 
 df = load_data()
 
+# Rule pre-filter: obvious cases are decided before the model is called.
+# Without a rules file the default rule is calibrated on the labelled dataset.
+@st.cache_resource
+def load_prefilter():
+    if features is None:
+        return [], PrefilterStats(), None
+    try:
+        rules, report = load_rules(), None
+        if rules is None:
+            rules, report = calibrate_rules(df)
+        return compile_rules(rules, list(features)), PrefilterStats(), report
+    except Exception as e:
+        st.warning(f"Rule pre-filter disabled: {e}")
+        return [], PrefilterStats(), None
+
+prefilter_rules, prefilter_stats, prefilter_report = load_prefilter()
+
+# Distinct values for the categorical inputs, computed once
+@st.cache_resource
+def load_encodings():
+    if shared_state.SHARED_STATE_DIR:
+        return shared_state.load_meta(shared_state.SHARED_STATE_DIR)["encodings"]
+    return {col: sorted(df[col].dropna().unique()) for col in shared_state.ENCODED_COLUMNS}
+
+encodings = load_encodings()
+
+# Worker processes for CPU-heavy plots so they don't block other sessions
+@st.cache_resource
+def load_executor():
+    if shared_state.SHARED_STATE_DIR:
+        return shared_state.create_executor(shared_state.SHARED_STATE_DIR)
+    return None
+
+executor = load_executor()
+
+@st.cache_data
+def feature_correlation():
+    if executor is not None:
+        return shared_state.correlation(executor)
+    return df.corr()
+
+@st.cache_data
+def amount_histogram(nbins=50):
+    if executor is not None:
+        return shared_state.amount_histogram(executor, nbins)
+    return shared_state.compute_amount_histogram(df, nbins)
+
 # Sidebar menu
-menu = st.sidebar.radio("Menu", options=["Home", "Data Exploration", "About"])
+menu = st.sidebar.radio("Menu", options=["Home", "Data Exploration", "Shadow Models", "About"])
 
 # Sidebar style override for menu items
 st.sidebar.markdown(
@@ -118,8 +184,8 @@ def prediction_page():
             trans_dayofweek = st.slider("Transaction Day of Week (1=Sun,7=Sat)", 1, 7, 3)
             trans_month = st.slider("Transaction Month (1-12)", 1, 12, 6)
             gender_index = st.selectbox("Gender", options=[0.0, 1.0], format_func=lambda x: "Female" if x == 0.0 else "Male")
-            category_index = st.selectbox("Category Index", options=sorted(df['category_index'].dropna().unique()))
-            state_index = st.selectbox("State Index", options=sorted(df['state_index'].dropna().unique()))
+            category_index = st.selectbox("Category Index", options=encodings['category_index'])
+            state_index = st.selectbox("State Index", options=encodings['state_index'])
             distance = st.number_input("Distance (miles)", min_value=0.0, step=0.01, format="%.2f")
             st.markdown('</div>', unsafe_allow_html=True)
         
@@ -143,13 +209,29 @@ def prediction_page():
             "distance": distance
         }
         input_df = pd.DataFrame([input_dict])
-        prediction = model.predict(input_df[features])[0]
+        X = input_df[features]
+        predictions, decided, champion_ms = score_with_rules(model, X, prefilter_rules, prefilter_stats)
+        undecided = ~decided
+        if undecided.any():
+            shadow_evaluator.submit(X[undecided], predictions[undecided], champion_ms)
+        prediction = predictions[0]
         
         if prediction == 1:
             st.error("🚨 Fraud Detected!")
         else:
             st.success("✅ Transaction appears genuine.")
 
+    st.sidebar.metric("Short-circuited by rules", f"{prefilter_stats.fraction:.1%}")
+    if prefilter_report is not None:
+        if prefilter_report["rule"] is None:
+            st.sidebar.caption("No rule met the calibration fraud-rate limit; all rows go to the model.")
+        else:
+            st.sidebar.caption(
+                f"Calibrated rule matches {prefilter_report['short_circuit_rate']:.1%} of the dataset, "
+                f"fraud rate {prefilter_report['matched_fraud_rate']:.3%} "
+                f"(overall {prefilter_report['fraud_rate']:.3%})."
+            )
+
 def data_exploration_page():
     st.markdown('<div class="title">📊 Data Exploration</div>', unsafe_allow_html=True)
     
@@ -168,17 +250,41 @@ def data_exploration_page():
     
     # Heatmap: correlation
     st.markdown('<div class="subheader">Feature Correlation Heatmap</div>', unsafe_allow_html=True)
-    corr = df.corr()
+    corr = feature_correlation()
     fig, ax = plt.subplots(figsize=(10, 6))
     sns.heatmap(corr, annot=True, fmt=".2f", cmap='Blues', ax=ax)
     st.pyplot(fig)
     
     # Histogram: transaction amount distribution
     st.markdown('<div class="subheader">Transaction Amount Distribution</div>', unsafe_allow_html=True)
-    fig_hist = px.histogram(df, x="amt", nbins=50, title="Transaction Amount Distribution", color="is_fraud",
-                            color_discrete_map={0:"blue",1:"red"})
+    hist = amount_histogram(50)
+    fig_hist = px.bar(hist, x="amt", y="count", title="Transaction Amount Distribution", color="is_fraud",
+                      color_discrete_map={"0":"blue","1":"red"}, barmode="relative")
+    fig_hist.update_layout(bargap=0)
     st.plotly_chart(fig_hist, use_container_width=True)
 
+def shadow_models_page():
+    st.markdown('<div class="title">🧪 Shadow Model Evaluation</div>', unsafe_allow_html=True)
+
+    if not shadow_evaluator.models:
+        st.info("No shadow models found. Place challenger models next to the app as shadow_<name>.pkl.")
+        return
+
+    st.markdown('<div class="subheader">Champion vs Challengers</div>', unsafe_allow_html=True)
+    summary = shadow_evaluator.summary()
+    st.dataframe(summary, use_container_width=True)
+
+    st.markdown('<div class="subheader">Latency History</div>', unsafe_allow_html=True)
+    name = st.selectbox("Shadow model", options=list(shadow_evaluator.models))
+    history = shadow_evaluator.latency_history(name)
+    if history.empty:
+        st.write("No transactions scored yet.")
+        return
+    history["timestamp"] = pd.to_datetime(history["timestamp"], unit="s")
+    fig_latency = px.line(history, x="timestamp", y=["champion_ms", "shadow_ms"],
+                          labels={'value': 'Latency (ms)', 'variable': 'Model'})
+    st.plotly_chart(fig_latency, use_container_width=True)
+
 def about_page():
     st.markdown('<div class="title">ℹ️ About This App</div>', unsafe_allow_html=True)
     st.markdown(
@@ -201,6 +307,8 @@ if menu == "Home":
     prediction_page()
 elif menu == "Data Exploration":
     data_exploration_page()
+elif menu == "Shadow Models":
+    shadow_models_page()
 else:
     about_page()
 
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Rules used instead of the calibrated default when present. Deployment-specific
+# rules such as blocked states/categories belong here, e.g.
+#   {"name": "blocked_state", "when": [["state_index", "in", [3.0, 7.0]]], "decision": 1}
+RULES_FILE = "prefilter_rules.json"
+
+# Labels a rule may assign (0 = genuine, 1 = fraud)
+DECISIONS = (0, 1)
+
+# Calibration of the default rule: candidate thresholds are these quantiles of
+# amt/distance, and a candidate is only accepted if the labelled rows it would
+# short-circuit are (almost) never fraud and there are enough of them.
+CALIBRATION_QUANTILES = np.round(np.linspace(0.05, 0.95, 19), 2)
+MAX_MATCHED_FRAUD_RATE = 0.0005
+MIN_MATCHED_ROWS = 1000
+
+COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+MEMBERSHIP = {
+    "in": lambda col, values: np.isin(col, values),
+    "not in": lambda col, values: ~np.isin(col, values),
+}
+RANGES = {
+    "between": lambda col, bounds: (col >= bounds[0]) & (col <= bounds[1]),
+}
+OPERATORS = {**COMPARISONS, **MEMBERSHIP, **RANGES}
+
+
+def load_rules(path=RULES_FILE):
+    """Rules from ``path``, or None if there is no rules file."""
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def _cumulative_counts(cell, k, weights=None):
+    # out[a + 1, d] = (weighted) rows with amt <= amt_t[a] and distance <= dist_t[d]; out[0] = 0
+    grid = np.bincount(cell, weights=weights, minlength=(k + 1) ** 2).reshape(k + 1, k + 1)
+    return np.pad(grid.cumsum(axis=0).cumsum(axis=1)[:k, :k], ((1, 0), (0, 0)))
+
+
+def calibrate_rules(df, max_fraud_rate=MAX_MATCHED_FRAUD_RATE, min_rows=MIN_MATCHED_ROWS):
+    """Derive the default "genuine" rule from labelled data.
+
+    Searches ``lo < amt <= hi`` and ``distance <= d`` over quantile thresholds
+    and keeps the region covering the most rows whose fraud rate is at most
+    ``max_fraud_rate``. The lower amount bound lets the search exclude tiny
+    amounts when those carry card-testing fraud. Returns (rules, report);
+    ``rules`` is empty when no region is clean enough.
+    """
+    amt = df["amt"].to_numpy(dtype=float)
+    distance = df["distance"].to_numpy(dtype=float)
+    fraud = df["is_fraud"].to_numpy() == 1
+    report = {
+        "rows": len(df),
+        "fraud_rate": float(fraud.mean()) if len(df) else 0.0,
+        "short_circuit_rate": 0.0,
+        "matched_fraud_rate": None,
+        "rule": None,
+    }
+    if len(df) == 0:
+        return [], report
+
+    amt_t = np.quantile(amt, CALIBRATION_QUANTILES)
+    dist_t = np.quantile(distance, CALIBRATION_QUANTILES)
+    k = len(CALIBRATION_QUANTILES)
+    # Bin b satisfies x <= t[i] exactly when b <= i; bin k is above every threshold
+    cell = np.searchsorted(amt_t, amt, side="left") * (k + 1) + np.searchsorted(dist_t, distance, side="left")
+    counts = _cumulative_counts(cell, k)
+    frauds = _cumulative_counts(cell, k, weights=fraud.astype(float))
+    # Candidates indexed [lo + 1, hi, d]; lo = -1 means no lower amount bound
+    lo, hi = np.meshgrid(np.arange(-1, k), np.arange(k), indexing="ij")
+    matched = counts[hi + 1] - counts[lo + 1]
+    matched_fraud = frauds[hi + 1] - frauds[lo + 1]
+    valid = (lo < hi)[..., None] & (matched >= min_rows) & (matched_fraud <= max_fraud_rate * matched)
+    if not valid.any():
+        return [], report
+
+    best = np.unravel_index(np.argmax(np.where(valid, matched, -1)), matched.shape)
+    lo_i, hi_i, d_i = int(lo[best[:2]]), int(hi[best[:2]]), best[2]
+    when = [["amt", "<=", float(amt_t[hi_i])], ["distance", "<=", float(dist_t[d_i])]]
+    if lo_i >= 0:
+        when.insert(0, ["amt", ">", float(amt_t[lo_i])])
+    rule = {"name": "low_amount_near_home", "when": when, "decision": 0}
+    report.update({
+        "short_circuit_rate": float(matched[best] / len(df)),
+        "matched_fraud_rate": float(matched_fraud[best] / matched[best]),
+        "rule": rule,
+    })
+    return [rule], report
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+def _check_condition(name, condition, features):
+    if not isinstance(condition, (list, tuple)) or len(condition) != 3:
+        raise ValueError(f"Rule '{name}' has malformed condition {condition!r}, expected [column, op, value]")
+    column, op, value = condition
+    if column not in features:
+        raise ValueError(f"Rule '{name}' uses unknown column '{column}'")
+    if op not in OPERATORS:
+        raise ValueError(f"Rule '{name}' uses unknown operator '{op}'")
+    if op in COMPARISONS and not _is_number(value):
+        raise ValueError(f"Rule '{name}': '{op}' needs a number, got {value!r}")
+    if op in MEMBERSHIP and not (isinstance(value, list) and value and all(map(_is_number, value))):
+        raise ValueError(f"Rule '{name}': '{op}' needs a non-empty list of numbers, got {value!r}")
+    if op in RANGES and not (
+        isinstance(value, (list, tuple)) and len(value) == 2
+        and all(map(_is_number, value)) and value[0] <= value[1]
+    ):
+        raise ValueError(f"Rule '{name}': '{op}' needs [low, high], got {value!r}")
+
+
+def compile_rules(rules, features):
+    """Turn rule dicts into (name, decision, mask_fn) tuples.
+
+    Each ``mask_fn`` takes a 2D feature array (columns ordered as
+    ``features``) and returns a boolean mask, so a batch is evaluated with
+    a handful of vectorized comparisons instead of per-row Python code.
+    Malformed rules raise ValueError here rather than on the scoring path.
+    """
+    compiled = []
+    for rule in rules:
+        name = rule.get("name", "<unnamed>")
+        when = rule.get("when")
+        if not isinstance(when, list) or not when:
+            raise ValueError(f"Rule '{name}' needs at least one condition in 'when'")
+        decision = rule.get("decision")
+        if decision not in DECISIONS or isinstance(decision, bool):
+            raise ValueError(f"Rule '{name}' has invalid decision {decision!r}, expected 0 or 1")
+        conditions = []
+        for condition in when:
+            _check_condition(name, condition, features)
+            column, op, value = condition
+            conditions.append((features.index(column), OPERATORS[op], value))
+
+        def mask_fn(values, conditions=conditions):
+            mask = np.ones(len(values), dtype=bool)
+            for idx, op, value in conditions:
+                mask &= op(values[:, idx], value)
+            return mask
+
+        compiled.append((name, int(decision), mask_fn))
+    return compiled
+
+
+def apply_rules(compiled, X):
+    """Return (decisions, decided) for a feature frame.
+
+    ``decisions`` holds the rule outcome for decided rows and -1 elsewhere.
+    """
+    values = X.to_numpy(dtype=float)
+    decisions = np.full(len(values), -1, dtype=int)
+    decided = np.zeros(len(values), dtype=bool)
+    for _, decision, mask_fn in compiled:
+        hit = mask_fn(values) & ~decided
+        decisions[hit] = decision
+        decided |= hit
+        if decided.all():
+            break
+    return decisions, decided
+
+
+class PrefilterStats:
+    """Running count of rows decided by rules versus sent to the model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.short_circuited = 0
+
+    def record(self, total, short_circuited):
+        with self._lock:
+            self.total += total
+            self.short_circuited += short_circuited
+
+    @property
+    def fraction(self):
+        with self._lock:
+            return self.short_circuited / self.total if self.total else 0.0
+
+
+def score_with_rules(model, X, compiled, stats=None):
+    """Score a batch, calling the model only for rows no rule decided.
+
+    Returns (predictions, decided, model_ms) where ``decided`` marks the
+    short-circuited rows and ``model_ms`` is the time spent in
+    ``model.predict`` on the remaining rows (0.0 if there were none).
+    """
+    predictions, decided = apply_rules(compiled, X)
+    undecided = ~decided
+    model_ms = 0.0
+    if undecided.any():
+        X_model = X[undecided]
+        start = time.perf_counter()
+        predictions[undecided] = model.predict(X_model)
+        model_ms = (time.perf_counter() - start) * 1000.0
+    if stats is not None:
+        stats.record(len(X), int(decided.sum()))
+    return predictions, decided, model_ms
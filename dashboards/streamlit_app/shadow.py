@@ -0,0 +1,112 @@
+import glob
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Challenger models are picked up from files named like shadow_<name>.pkl
+SHADOW_MODEL_PATTERN = "shadow_*.pkl"
+
+# Number of recent scoring calls kept per shadow model
+BUFFER_SIZE = 5000
+
+# Batches a shadow model may have queued or running; further batches are dropped
+MAX_IN_FLIGHT = 4
+
+
+def load_shadow_models(pattern=SHADOW_MODEL_PATTERN):
+    models = {}
+    for path in sorted(glob.glob(pattern)):
+        name = os.path.splitext(os.path.basename(path))[0][len("shadow_"):]
+        models[name] = joblib.load(path)
+    return models
+
+
+class ShadowEvaluator:
+    """Runs challenger models next to the champion without blocking it.
+
+    Every call to ``submit`` hands the feature batch to a background thread
+    pool. Each model has at most ``max_in_flight`` batches pending; when a
+    challenger falls behind, new batches are dropped (and counted) rather
+    than queued, so a slow model cannot build up an unbounded backlog.
+    """
+
+    def __init__(self, models, max_workers=2, buffer_size=BUFFER_SIZE, max_in_flight=MAX_IN_FLIGHT):
+        self.models = models
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        # Per model: (rows, disagreements, champion_ms, shadow_ms, timestamp)
+        self._buffers = {name: deque(maxlen=buffer_size) for name in models}
+        self._errors = {name: 0 for name in models}
+        self._dropped = {name: 0 for name in models}
+        self._slots = {name: threading.BoundedSemaphore(max_in_flight) for name in models}
+
+    def submit(self, X, champion_pred, champion_ms):
+        if not self.models:
+            return
+        champion_pred = np.asarray(champion_pred)
+        for name, model in self.models.items():
+            if not self._slots[name].acquire(blocking=False):
+                with self._lock:
+                    self._dropped[name] += 1
+                continue
+            try:
+                self._executor.submit(self._score, name, model, X, champion_pred, champion_ms)
+            except RuntimeError:
+                self._slots[name].release()
+                raise
+
+    def _score(self, name, model, X, champion_pred, champion_ms):
+        try:
+            start = time.perf_counter()
+            shadow_pred = np.asarray(model.predict(X))
+            shadow_ms = (time.perf_counter() - start) * 1000.0
+            if shadow_pred.shape != champion_pred.shape:
+                raise ValueError(f"Shadow output shape {shadow_pred.shape} != champion {champion_pred.shape}")
+            disagreements = int((shadow_pred != champion_pred).sum())
+        except Exception:
+            with self._lock:
+                self._errors[name] += 1
+            return
+        finally:
+            self._slots[name].release()
+        with self._lock:
+            self._buffers[name].append(
+                (len(champion_pred), disagreements, champion_ms, shadow_ms, time.time())
+            )
+
+    def summary(self):
+        rows = []
+        with self._lock:
+            snapshot = {name: list(buf) for name, buf in self._buffers.items()}
+            errors = dict(self._errors)
+            dropped = dict(self._dropped)
+        for name, records in snapshot.items():
+            row = {"model": name, "batches": len(records), "dropped": dropped[name], "errors": errors[name]}
+            if records:
+                arr = np.array(records, dtype=float)
+                scored = int(arr[:, 0].sum())
+                disagreements = int(arr[:, 1].sum())
+                row.update({
+                    "rows_scored": scored,
+                    "disagreements": disagreements,
+                    "disagreement_rate": disagreements / scored if scored else np.nan,
+                    "champion_p50_ms": np.median(arr[:, 2]),
+                    "shadow_p50_ms": np.median(arr[:, 3]),
+                    "champion_p95_ms": np.percentile(arr[:, 2], 95),
+                    "shadow_p95_ms": np.percentile(arr[:, 3], 95),
+                })
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def latency_history(self, name):
+        with self._lock:
+            records = list(self._buffers.get(name, ()))
+        return pd.DataFrame(
+            records, columns=["rows", "disagreements", "champion_ms", "shadow_ms", "timestamp"]
+        )
@@ -0,0 +1,172 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# When set, dashboards attach to a published snapshot instead of loading their own copies.
+# The path is a symlink to the current version; it is resolved once per process so a
+# process keeps reading one consistent version until it is restarted.
+SHARED_STATE_DIR = (
+    os.path.realpath(os.environ["FRAUD_SHARED_STATE_DIR"]) if os.environ.get("FRAUD_SHARED_STATE_DIR") else None
+)
+
+# Published versions kept on disk: the current one plus the previous one still
+# mapped by workers that have not been restarted yet
+KEEP_VERSIONS = 2
+
+# Worker processes for heavy computations, shared by all sessions of a dashboard process
+EXECUTOR_WORKERS = int(os.environ.get("FRAUD_EXECUTOR_WORKERS", "2"))
+
+MODEL_FILE = "model.joblib"
+FEATURES_FILE = "features.joblib"
+DATA_DIR = "data"
+META_FILE = "meta.json"
+
+# Categorical columns whose distinct values are precomputed for the input form
+ENCODED_COLUMNS = ["category_index", "state_index"]
+
+
+def publish(out_dir, model_path="fraud_model.pkl", features_path="model_features.pkl",
+            data_path="processed_fraud_data_single.csv", keep=KEEP_VERSIONS):
+    """Write the model, encodings and dataset in a memory-mappable layout.
+
+    Each dataset column is stored as its own ``.npy`` file (keeping its
+    dtype) so every process maps the same pages instead of holding a private
+    DataFrame. The model is dumped uncompressed and loaded with
+    ``mmap_mode``, which only shares estimators that keep their parameters
+    as plain numpy arrays. scikit-learn tree models copy their nodes on
+    load, so each process still holds its own copy of those.
+
+    Files are written to a new ``<out_dir>.<version>`` directory and
+    ``out_dir`` is then atomically re-pointed at it, so files that running
+    workers have mapped are never rewritten.
+    """
+    out_dir = os.path.abspath(out_dir)
+    if os.path.exists(out_dir) and not os.path.islink(out_dir):
+        raise ValueError(f"{out_dir} exists and is not a symlink from a previous publish; remove it first")
+    version_dir = f"{out_dir}.{time.time_ns()}"
+    os.makedirs(os.path.join(version_dir, DATA_DIR))
+
+    joblib.dump(joblib.load(model_path), os.path.join(version_dir, MODEL_FILE))
+    joblib.dump(joblib.load(features_path), os.path.join(version_dir, FEATURES_FILE))
+
+    df = pd.read_csv(data_path)
+    non_numeric = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])]
+    if non_numeric:
+        shutil.rmtree(version_dir)
+        raise ValueError(f"Shared dataset must be numeric, got: {non_numeric}")
+    for i, col in enumerate(df.columns):
+        np.save(os.path.join(version_dir, DATA_DIR, f"{i}.npy"), df[col].to_numpy())
+
+    meta = {
+        "columns": list(df.columns),
+        "encodings": {
+            col: sorted(df[col].dropna().unique().tolist()) for col in ENCODED_COLUMNS if col in df.columns
+        },
+    }
+    with open(os.path.join(version_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+
+    link = f"{out_dir}.link-{os.getpid()}"
+    os.symlink(version_dir, link)
+    os.replace(link, out_dir)
+    _remove_old_versions(out_dir, keep)
+    return version_dir
+
+
+def _remove_old_versions(out_dir, keep):
+    parent, base = os.path.split(out_dir)
+    versions = sorted(
+        (name for name in os.listdir(parent)
+         if name.startswith(base + ".") and name[len(base) + 1:].isdigit()),
+        key=lambda name: int(name[len(base) + 1:]),
+    )
+    for name in versions[:-keep]:
+        shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def load_model(state_dir):
+    model = joblib.load(os.path.join(state_dir, MODEL_FILE), mmap_mode="r")
+    features = joblib.load(os.path.join(state_dir, FEATURES_FILE))
+    return model, features
+
+
+def load_meta(state_dir):
+    with open(os.path.join(state_dir, META_FILE)) as f:
+        return json.load(f)
+
+
+def load_data(state_dir):
+    # Read-only views over the mapped files; nothing is copied into the process
+    columns = load_meta(state_dir)["columns"]
+    data = {
+        col: np.load(os.path.join(state_dir, DATA_DIR, f"{i}.npy"), mmap_mode="r")
+        for i, col in enumerate(columns)
+    }
+    return pd.DataFrame(data, copy=False)
+
+
+def compute_amount_histogram(df, nbins=50):
+    # Pre-binned counts per class, so only nbins rows per class reach the browser.
+    # Bars are placed at bin midpoints and the class is a string label so it
+    # plots as discrete colours.
+    edges = np.histogram_bin_edges(df["amt"].to_numpy(), bins=nbins)
+    midpoints = (edges[:-1] + edges[1:]) / 2
+    frames = []
+    for label, group in df.groupby("is_fraud")["amt"]:
+        counts, _ = np.histogram(group.to_numpy(), bins=edges)
+        frames.append(pd.DataFrame({"amt": midpoints, "count": counts, "is_fraud": str(int(label))}))
+    return pd.concat(frames, ignore_index=True)
+
+
+# ---------- Heavy computations run in worker processes ----------
+_worker_df = None
+
+
+def _init_worker(state_dir):
+    global _worker_df
+    _worker_df = load_data(state_dir)
+
+
+def _correlation():
+    return _worker_df.corr()
+
+
+def _amount_histogram(nbins):
+    return compute_amount_histogram(_worker_df, nbins)
+
+
+def create_executor(state_dir, max_workers=EXECUTOR_WORKERS):
+    # forkserver: forking the multi-threaded Streamlit server directly can deadlock
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=_init_worker,
+        initargs=(state_dir,),
+    )
+
+
+def correlation(executor):
+    return executor.submit(_correlation).result()
+
+
+def amount_histogram(executor, nbins=50):
+    return executor.submit(_amount_histogram, nbins).result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish the dashboard state for multi-worker deployments")
+    parser.add_argument("out_dir", help="Symlink to create or update, e.g. /dev/shm/fraud_state")
+    parser.add_argument("--model", default="fraud_model.pkl")
+    parser.add_argument("--features", default="model_features.pkl")
+    parser.add_argument("--data", default="processed_fraud_data_single.csv")
+    args = parser.parse_args()
+    version_dir = publish(args.out_dir, args.model, args.features, args.data)
+    print(f"Shared state written to {version_dir}; {args.out_dir} now points to it")
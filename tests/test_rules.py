@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rules import PrefilterStats, apply_rules, calibrate_rules, compile_rules, score_with_rules
+
+FEATURES = ["amt", "distance", "state_index", "category_index"]
+
+
+class RecordingModel:
+    def __init__(self, value=1):
+        self.value = value
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return np.full(len(X), self.value)
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=FEATURES)
+
+
+def rule(name, when, decision):
+    return {"name": name, "when": when, "decision": decision}
+
+
+def test_first_matching_rule_wins():
+    compiled = compile_rules([
+        rule("blocked_state", [["state_index", "in", [3.0]]], 1),
+        rule("small", [["amt", "<", 10.0]], 0),
+    ], FEATURES)
+    X = frame([[5.0, 1.0, 3.0, 0.0], [5.0, 1.0, 1.0, 0.0], [50.0, 1.0, 1.0, 0.0]])
+    decisions, decided = apply_rules(compiled, X)
+    assert decisions.tolist() == [1, 0, -1]
+    assert decided.tolist() == [True, True, False]
+
+
+def test_operators():
+    X = frame([[5.0, 1.0, 3.0, 2.0], [15.0, 8.0, 1.0, 4.0]])
+    cases = {
+        "between": ([["amt", "between", [0, 10]]], [True, False]),
+        "not_in": ([["category_index", "not in", [2.0]]], [False, True]),
+        "and": ([["amt", ">=", 5.0], ["distance", ">", 2.0]], [False, True]),
+    }
+    for name, (when, expected) in cases.items():
+        _, decided = apply_rules(compile_rules([rule(name, when, 0)], FEATURES), X)
+        assert decided.tolist() == expected, name
+
+
+@pytest.mark.parametrize("bad", [
+    rule("decision", [["amt", "<", 1.0]], 2),
+    rule("decision", [["amt", "<", 1.0]], "1"),
+    rule("decision", [["amt", "<", 1.0]], True),
+    rule("empty", [], 0),
+    rule("missing", None, 0),
+    rule("column", [["merchant", "<", 1.0]], 0),
+    rule("operator", [["amt", "~", 1.0]], 0),
+    rule("arity", [["amt", "<"]], 0),
+    rule("scalar", [["amt", "<", "1"]], 0),
+    rule("between", [["amt", "between", 5]], 0),
+    rule("between", [["amt", "between", [10, 5]]], 0),
+    rule("in", [["state_index", "in", 3.0]], 0),
+    rule("in", [["state_index", "in", []]], 0),
+])
+def test_malformed_rules_are_rejected_at_compile_time(bad):
+    with pytest.raises(ValueError):
+        compile_rules([bad], FEATURES)
+
+
+def test_score_with_rules_only_calls_model_for_undecided_rows():
+    compiled = compile_rules([rule("small", [["amt", "<", 10.0]], 0)], FEATURES)
+    X = frame([[5.0, 1.0, 1.0, 0.0], [50.0, 1.0, 1.0, 0.0], [6.0, 1.0, 1.0, 0.0], [70.0, 1.0, 1.0, 0.0]])
+    model = RecordingModel(value=1)
+    stats = PrefilterStats()
+
+    predictions, decided, model_ms = score_with_rules(model, X, compiled, stats)
+    assert predictions.tolist() == [0, 1, 0, 1]
+    assert model.calls == [2]
+    assert model_ms >= 0.0
+
+    score_with_rules(model, X.iloc[[0]], compiled, stats)
+    assert model.calls == [2]
+    assert stats.total == 5
+    assert stats.fraction == pytest.approx(3 / 5)
+
+
+def test_calibration_excludes_card_testing_and_meets_fraud_limit():
+    rng = np.random.default_rng(0)
+    n = 200_000
+    amt = rng.lognormal(3.5, 1.2, n)
+    distance = rng.random(n) * 100
+    # Fraud concentrates in large amounts and in tiny card-testing amounts
+    p = np.where(amt > 300, 0.2, 0.0005) + np.where(amt < 2, 0.05, 0.0)
+    df = pd.DataFrame({"amt": amt, "distance": distance, "is_fraud": (rng.random(n) < p).astype(int)})
+
+    rules, report = calibrate_rules(df)
+    assert len(rules) == 1
+    _, decided = apply_rules(compile_rules(rules, ["amt", "distance"]), df[["amt", "distance"]])
+    matched_fraud = df["is_fraud"].to_numpy()[decided]
+
+    assert report["short_circuit_rate"] == pytest.approx(decided.mean())
+    assert report["short_circuit_rate"] > 0.5
+    assert report["matched_fraud_rate"] == pytest.approx(matched_fraud.mean())
+    assert report["matched_fraud_rate"] <= 0.0005
+    assert not decided[df["amt"] < 2].any()
+
+
+def test_calibration_returns_no_rule_when_nothing_is_clean():
+    df = pd.DataFrame({"amt": np.arange(5000.0), "distance": np.ones(5000), "is_fraud": np.arange(5000) % 10 == 0})
+    rules, report = calibrate_rules(df)
+    assert rules == []
+    assert report["rule"] is None
+    assert report["fraud_rate"] == pytest.approx(0.1)
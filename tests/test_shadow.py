@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shadow import ShadowEvaluator
+
+
+class ConstantModel:
+    def __init__(self, value, delay=0.0):
+        self.value = value
+        self.delay = delay
+
+    def predict(self, X):
+        time.sleep(self.delay)
+        return np.full(len(X), self.value)
+
+
+class WrongShapeModel:
+    def predict(self, X):
+        return np.zeros(len(X) + 1, dtype=int)
+
+
+class FailingModel:
+    def predict(self, X):
+        raise RuntimeError("boom")
+
+
+X = pd.DataFrame({"amt": [1.0, 2.0, 3.0, 4.0]})
+CHAMPION = np.array([0, 1, 0, 1])
+
+
+def drain(evaluator):
+    evaluator._executor.shutdown(wait=True)
+    return evaluator.summary().set_index("model")
+
+
+def test_disagreement_rate_and_latencies():
+    evaluator = ShadowEvaluator({"zeros": ConstantModel(0), "ones": ConstantModel(1)})
+    for _ in range(3):
+        evaluator.submit(X, CHAMPION, 2.5)
+    summary = drain(evaluator)
+
+    assert summary.loc["zeros", "batches"] == 3
+    assert summary.loc["zeros", "rows_scored"] == 12
+    assert summary.loc["zeros", "disagreements"] == 6
+    assert summary.loc["zeros", "disagreement_rate"] == pytest.approx(0.5)
+    assert summary.loc["ones", "disagreement_rate"] == pytest.approx(0.5)
+    assert summary.loc["zeros", "champion_p50_ms"] == pytest.approx(2.5)
+    assert summary.loc["zeros", "dropped"] == 0
+    assert summary.loc["zeros", "errors"] == 0
+
+
+def test_slow_model_drops_batches_beyond_in_flight_limit():
+    evaluator = ShadowEvaluator({"slow": ConstantModel(0, delay=0.2)}, max_in_flight=4)
+    for _ in range(10):
+        evaluator.submit(X, CHAMPION, 1.0)
+    summary = drain(evaluator)
+
+    assert summary.loc["slow", "batches"] == 4
+    assert summary.loc["slow", "dropped"] == 6
+    assert summary.loc["slow", "errors"] == 0
+
+
+def test_failures_are_counted_and_release_slots():
+    evaluator = ShadowEvaluator({"shape": WrongShapeModel(), "fail": FailingModel()}, max_in_flight=1)
+    for _ in range(3):
+        evaluator.submit(X, CHAMPION, 1.0)
+        time.sleep(0.05)
+    summary = drain(evaluator)
+
+    for name in ("shape", "fail"):
+        assert summary.loc[name, "errors"] == 3
+        assert summary.loc[name, "batches"] == 0
+        assert summary.loc[name, "dropped"] == 0
+
+
+def test_no_models_is_a_no_op():
+    evaluator = ShadowEvaluator({})
+    evaluator.submit(X, CHAMPION, 1.0)
+    assert evaluator.summary().empty
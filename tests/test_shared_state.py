@@ -0,0 +1,104 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_state
+
+
+def is_memory_mapped(array):
+    while array is not None and not isinstance(array, np.memmap):
+        array = getattr(array, "base", None)
+    return array is not None
+
+
+@pytest.fixture
+def sources(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        "amt": rng.random(n) * 100,
+        "category_index": rng.integers(0, 5, n).astype(float),
+        "state_index": rng.integers(0, 3, n),
+        "is_fraud": rng.integers(0, 2, n),
+    })
+    paths = {
+        "model_path": str(tmp_path / "fraud_model.pkl"),
+        "features_path": str(tmp_path / "model_features.pkl"),
+        "data_path": str(tmp_path / "processed_fraud_data_single.csv"),
+    }
+    joblib.dump({"coef": np.arange(10.0)}, paths["model_path"])
+    joblib.dump(["amt", "category_index", "state_index"], paths["features_path"])
+    df.to_csv(paths["data_path"], index=False)
+    return paths
+
+
+def test_round_trip_keeps_values_and_dtypes(tmp_path, sources):
+    out = str(tmp_path / "state")
+    shared_state.publish(out, **sources)
+
+    expected = pd.read_csv(sources["data_path"])
+    df = shared_state.load_data(out)
+    assert list(df.columns) == list(expected.columns)
+    assert df.dtypes.equals(expected.dtypes)
+    for col in expected.columns:
+        np.testing.assert_array_equal(df[col].to_numpy(), expected[col].to_numpy())
+    assert is_memory_mapped(df["amt"].to_numpy())
+    assert not df["amt"].to_numpy().flags.writeable
+
+    model, features = shared_state.load_model(out)
+    assert model["coef"].tolist() == list(range(10))
+    assert features == ["amt", "category_index", "state_index"]
+    encodings = shared_state.load_meta(out)["encodings"]
+    assert encodings["state_index"] == [0, 1, 2]
+
+
+def test_republish_does_not_touch_mapped_version(tmp_path, sources):
+    out = str(tmp_path / "state")
+    first = shared_state.publish(out, **sources)
+    old_df = shared_state.load_data(first)
+    old_values = old_df["amt"].to_numpy().copy()
+
+    pd.read_csv(sources["data_path"]).assign(amt=-1.0).to_csv(sources["data_path"], index=False)
+    second = shared_state.publish(out, **sources)
+
+    assert os.path.realpath(out) == second != first
+    np.testing.assert_array_equal(old_df["amt"].to_numpy(), old_values)
+    assert (shared_state.load_data(out)["amt"] == -1.0).all()
+
+    third = shared_state.publish(out, **sources, keep=2)
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
+
+
+def test_publish_refuses_to_replace_a_plain_directory(tmp_path, sources):
+    out = tmp_path / "state"
+    out.mkdir()
+    with pytest.raises(ValueError):
+        shared_state.publish(str(out), **sources)
+
+
+def test_executor_matches_local_computation(tmp_path, sources):
+    out = str(tmp_path / "state")
+    shared_state.publish(out, **sources)
+    df = shared_state.load_data(out)
+
+    executor = shared_state.create_executor(out, max_workers=1)
+    try:
+        pd.testing.assert_frame_equal(
+            shared_state.amount_histogram(executor, nbins=10),
+            shared_state.compute_amount_histogram(df, nbins=10),
+        )
+        pd.testing.assert_frame_equal(shared_state.correlation(executor), df.corr())
+    finally:
+        executor.shutdown()
+
+
+def test_amount_histogram_bins():
+    df = pd.DataFrame({"amt": [0.0, 1.0, 9.0, 10.0], "is_fraud": [0, 0, 1, 1]})
+    hist = shared_state.compute_amount_histogram(df, nbins=2)
+    assert hist["amt"].tolist() == [2.5, 7.5, 2.5, 7.5]
+    assert hist["count"].tolist() == [2, 0, 0, 2]
+    assert hist["is_fraud"].tolist() == ["0", "0", "1", "1"]
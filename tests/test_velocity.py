@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import velocity
+from velocity import VelocityIndex
+
+HOUR = 3600
+
+
+def naive_window(df, entity_col, entity, hours, end):
+    mask = (
+        (df[entity_col] == entity)
+        & (df["unix_time"] >= end - hours * HOUR)
+        & (df["unix_time"] <= end)
+    )
+    return int(mask.sum()), float(df.loc[mask, "amt"].sum()), set(np.flatnonzero(mask.to_numpy()))
+
+
+def assert_matches(index, df, entities, hours_list):
+    end = int(df["unix_time"].max())
+    assert index.latest == end
+    for entity in entities:
+        for hours in hours_list:
+            count, amount, rows = index.window(entity, hours)
+            expected_count, expected_amount, expected_rows = naive_window(df, "cc_num", entity, hours, end)
+            assert count == expected_count
+            assert amount == pytest.approx(expected_amount)
+            assert set(rows.tolist()) == expected_rows
+
+
+def random_frame(rng, n, start, stop, cards=10):
+    return pd.DataFrame({
+        "cc_num": rng.integers(0, cards, n),
+        "unix_time": rng.integers(start, stop, n),
+        "amt": rng.random(n) * 100,
+    })
+
+
+def test_window_matches_naive_filter():
+    rng = np.random.default_rng(0)
+    df = random_frame(rng, 2000, 0, 10 * 24 * HOUR)
+    index = VelocityIndex.from_frame(df, "cc_num")
+    assert_matches(index, df, range(10), [1, 6, 24, 72])
+    count, amount, rows = index.window(999, 24)
+    assert (count, amount, len(rows)) == (0, 0.0, 0)
+
+
+def test_streaming_adds_with_late_events_trims_and_growth(monkeypatch):
+    # Small initial capacity forces both retention trims and growth
+    monkeypatch.setattr(velocity, "INITIAL_CAPACITY", 4)
+    rng = np.random.default_rng(1)
+    df = random_frame(rng, 20, 0, 24 * HOUR, cards=3)
+    index = VelocityIndex.from_frame(df, "cc_num", retention_hours=48)
+
+    for _ in range(10):
+        start = int(df["unix_time"].max()) - 12 * HOUR  # overlaps the past: late events
+        batch = random_frame(rng, 200, start, start + 36 * HOUR, cards=3)
+        index.update_from_frame(batch, row_offset=len(df))
+        df = pd.concat([df, batch], ignore_index=True)
+        assert_matches(index, df, range(3), [1, 12, 48])
+
+    # Old slots were reused, so arrays stay well below the full history
+    for card, series in index._series.items():
+        assert series.size < (df["cc_num"] == card).sum()
+
+
+def test_datetime_strings_and_velocity():
+    df = pd.DataFrame({
+        "merchant": ["a", "b", "a", "a"],
+        "trans_date_trans_time": [
+            "2020-01-01 00:00:00", "2020-01-01 01:00:00",
+            "2020-01-01 02:00:00", "2020-01-01 03:00:00",
+        ],
+        "amt": [1.0, 2.0, 3.0, 4.0],
+    })
+    index = VelocityIndex.from_frame(df, "merchant")
+    count, amount, rows = index.window("a", 2)
+    assert (count, amount, rows.tolist()) == (2, 7.0, [2, 3])
+    assert index.velocity("a", 4) == pytest.approx(0.75)
+
+
+def test_missing_entities_are_skipped():
+    df = pd.DataFrame({
+        "state": ["NY", None, np.nan, "CA"],
+        "unix_time": [0, 10, 20, 30],
+        "amt": [1.0, 2.0, 3.0, 4.0],
+    })
+    index = VelocityIndex.from_frame(df, "state")
+    assert len(index) == 2
+    assert index.window("NY", 1)[:2] == (1, 1.0)
+    assert index.window("CA", 1)[:2] == (1, 4.0)
+
+    index.add(np.nan, 40, 5.0)
+    index.add(None, 40, 5.0)
+    assert len(index) == 2
+
+
+def test_windows_are_consistent_across_bulk_load_and_trims(monkeypatch):
+    monkeypatch.setattr(velocity, "INITIAL_CAPACITY", 4)
+    # One card, one transaction every 25h over ~400h
+    df = pd.DataFrame({"cc_num": 1, "unix_time": np.arange(16) * 25 * HOUR, "amt": 1.0})
+    index = VelocityIndex.from_frame(df, "cc_num", retention_hours=48)
+    assert index.count(1, 48) == naive_window(df, "cc_num", 1, 48, int(df["unix_time"].max()))[0]
+
+    for i in range(16, 33):
+        batch = pd.DataFrame({"cc_num": [1], "unix_time": [i * 25 * HOUR], "amt": [1.0]})
+        index.update_from_frame(batch)
+        df = pd.concat([df, batch], ignore_index=True)
+        assert_matches(index, df, [1], [1, 24, 25, 48])
+
+    # Windows longer than retention are rejected rather than silently truncated
+    with pytest.raises(ValueError):
+        index.window(1, 400)
+    with pytest.raises(ValueError):
+        index.window(1, 24, end=index.latest - 48 * HOUR)
+    with pytest.raises(ValueError):
+        index.window(999, 400)
+
+
+def test_events_older_than_retention_are_ignored():
+    df = pd.DataFrame({"cc_num": [1, 1], "unix_time": [0, 100 * HOUR], "amt": [5.0, 7.0]})
+    index = VelocityIndex.from_frame(df, "cc_num", retention_hours=48)
+    assert index._series[1].size == 1
+    index.add(1, 10 * HOUR, 3.0)
+    assert index.window(1, 48)[:2] == (1, 7.0)
+
+
+def test_row_ids_continue_after_bulk_load():
+    df = pd.DataFrame({"cc_num": [1, 2, np.nan], "unix_time": [0, 10, 20], "amt": [1.0, 2.0, 3.0]})
+    index = VelocityIndex.from_frame(df, "cc_num")
+    batch = pd.DataFrame({"cc_num": [1, 2], "unix_time": [30, 40], "amt": [4.0, 5.0]})
+    index.update_from_frame(batch)
+    index.add(1, 50, 6.0)
+
+    full = pd.concat([df, batch], ignore_index=True)
+    assert index.window(1, 1)[2].tolist() == [0, 3, 5]
+    assert index.window(2, 1)[2].tolist() == [1, 4]
+    assert full.iloc[[0, 3]]["amt"].tolist() == [1.0, 4.0]
+
+
+def test_coerce_entity():
+    assert velocity.coerce_entity("4242", np.dtype("int64")) == 4242
+    assert velocity.coerce_entity("4242", np.dtype("float64")) == 4242.0
+    assert velocity.coerce_entity("NY", np.dtype("object")) == "NY"
+    with pytest.raises(ValueError, match="not a valid value"):
+        velocity.coerce_entity("abc", np.dtype("int64"))
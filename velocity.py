@@ -0,0 +1,219 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Columns of fraud_data that investigations usually pivot on
+ENTITY_COLUMNS = ["cc_num", "merchant", "state", "category"]
+
+# How much history is kept; windows reaching further back are rejected
+DEFAULT_RETENTION_HOURS = 24 * 30
+
+INITIAL_CAPACITY = 16
+
+
+def to_epoch_seconds(values):
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.int64)
+    return pd.to_datetime(values).to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def coerce_entity(value, dtype):
+    """Parse user input (e.g. a card number typed as text) to the column's dtype."""
+    try:
+        return pd.Series([value]).astype(dtype).iloc[0]
+    except (TypeError, ValueError):
+        raise ValueError(f"'{value}' is not a valid value for a {dtype} column") from None
+
+
+def time_column(df):
+    for col in ("unix_time", "trans_date_trans_time"):
+        if col in df.columns:
+            return col
+    raise KeyError("No transaction time column (unix_time / trans_date_trans_time) in data")
+
+
+class _Series:
+    # Per-entity arrays kept sorted by time; cum[i] is the sum of amounts[:i]
+    __slots__ = ("ts", "amounts", "cum", "rows", "size")
+
+    def __init__(self, ts, amounts, rows):
+        n = len(ts)
+        capacity = max(INITIAL_CAPACITY, 2 * n)
+        self.ts = np.empty(capacity, dtype=np.int64)
+        self.amounts = np.empty(capacity, dtype=np.float64)
+        self.cum = np.zeros(capacity + 1, dtype=np.float64)
+        self.rows = np.empty(capacity, dtype=np.int64)
+        self.size = n
+        self.ts[:n] = ts
+        self.amounts[:n] = amounts
+        self.rows[:n] = rows
+        np.cumsum(amounts, out=self.cum[1:n + 1])
+
+    def _trim(self, cutoff):
+        lo = int(np.searchsorted(self.ts[:self.size], cutoff, side="left"))
+        if lo == 0:
+            return
+        n = self.size - lo
+        self.ts[:n] = self.ts[lo:self.size]
+        self.amounts[:n] = self.amounts[lo:self.size]
+        self.rows[:n] = self.rows[lo:self.size]
+        self.cum[:n + 1] = self.cum[lo:self.size + 1] - self.cum[lo]
+        self.size = n
+
+    def _grow(self):
+        capacity = 2 * len(self.ts)
+        for name in ("ts", "amounts", "rows"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        cum = np.zeros(capacity + 1, dtype=np.float64)
+        cum[:self.size + 1] = self.cum[:self.size + 1]
+        self.cum = cum
+
+    def add(self, ts, amount, row, cutoff):
+        if self.size == len(self.ts):
+            # Reuse slots that fell out of the retention window before growing
+            self._trim(cutoff)
+            if self.size == len(self.ts):
+                self._grow()
+        n = self.size
+        pos = n if n == 0 or ts >= self.ts[n - 1] else int(np.searchsorted(self.ts[:n], ts, side="right"))
+        if pos < n:
+            # Late event: shift the tail and rebuild prefix sums from pos
+            self.ts[pos + 1:n + 1] = self.ts[pos:n]
+            self.amounts[pos + 1:n + 1] = self.amounts[pos:n]
+            self.rows[pos + 1:n + 1] = self.rows[pos:n]
+        self.ts[pos] = ts
+        self.amounts[pos] = amount
+        self.rows[pos] = row
+        self.size = n + 1
+        np.cumsum(self.amounts[pos:n + 1], out=self.cum[pos + 1:n + 2])
+        self.cum[pos + 1:n + 2] += self.cum[pos]
+
+    def bounds(self, start, end):
+        ts = self.ts[:self.size]
+        return int(np.searchsorted(ts, start, side="left")), int(np.searchsorted(ts, end, side="right"))
+
+
+class VelocityIndex:
+    """In-memory per-entity index of transaction times and amounts.
+
+    Built once from a ``fraud_data`` frame and then fed new transactions via
+    ``add`` / ``update_from_frame``. Windowed count, sum and velocity queries
+    are two binary searches plus a prefix-sum lookup. Transactions whose
+    entity value is missing (NaN/None) are skipped.
+
+    Everything from ``latest - retention_hours`` onwards is always kept;
+    older transactions may be dropped, so windows starting before that
+    point raise ValueError instead of returning partial counts.
+    """
+
+    def __init__(self, entity_col, retention_hours=DEFAULT_RETENTION_HOURS):
+        self.entity_col = entity_col
+        self.retention_hours = retention_hours
+        self.retention = int(retention_hours * 3600)
+        self.latest = None
+        self.next_row = 0
+        self._series = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, entity_col, time_col=None, amount_col="amt",
+                   retention_hours=DEFAULT_RETENTION_HOURS):
+        index = cls(entity_col, retention_hours)
+        index.next_row = len(df)
+        if df.empty:
+            return index
+        ts = to_epoch_seconds(df[time_col or time_column(df)])
+        amounts = df[amount_col].to_numpy(dtype=np.float64)
+        entities = df[entity_col].to_numpy()
+        rows = np.arange(len(df), dtype=np.int64)
+
+        # factorize marks missing entities with code -1; those rows are dropped,
+        # as are rows already outside the retention window
+        codes, keys = pd.factorize(entities)
+        present = np.flatnonzero(codes >= 0)
+        if len(present) == 0:
+            return index
+        index.latest = int(ts[present].max())
+        present = present[ts[present] >= index.latest - index.retention]
+        order = present[np.lexsort((ts[present], codes[present]))]
+        starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+        ends = np.append(starts[1:], len(order))
+        for lo, hi in zip(starts, ends):
+            sel = order[lo:hi]
+            index._series[keys[codes[sel[0]]]] = _Series(ts[sel], amounts[sel], rows[sel])
+        return index
+
+    def add(self, entity, ts, amount, row=None):
+        """Index one transaction; ``row`` defaults to the next unused row id."""
+        ts = int(ts)
+        with self._lock:
+            if row is None:
+                row = self.next_row
+            self.next_row = max(self.next_row, int(row) + 1)
+            if pd.isna(entity):
+                return
+            if self.latest is None or ts > self.latest:
+                self.latest = ts
+            cutoff = self.latest - self.retention
+            if ts < cutoff:
+                return
+            series = self._series.get(entity)
+            if series is None:
+                self._series[entity] = _Series(np.array([ts]), np.array([float(amount)]), np.array([row]))
+            else:
+                series.add(ts, float(amount), row, cutoff)
+
+    def update_from_frame(self, df, time_col=None, amount_col="amt", row_offset=None):
+        """Feed a batch of new transactions, e.g. rows appended since the last load.
+
+        Row ids continue from the last id handed out unless ``row_offset`` is given.
+        """
+        if row_offset is None:
+            row_offset = self.next_row
+        ts = to_epoch_seconds(df[time_col or time_column(df)])
+        amounts = df[amount_col].to_numpy(dtype=np.float64)
+        rows = row_offset + np.arange(len(df), dtype=np.int64)
+        for entity, t, amount, row in zip(df[self.entity_col].to_numpy(), ts, amounts, rows):
+            self.add(entity, t, amount, int(row))
+
+    def window(self, entity, hours, end=None):
+        """Return (count, amount_sum, row_ids) for ``entity`` in the last ``hours``.
+
+        ``end`` defaults to the newest timestamp seen by the index. Raises
+        ValueError if the window reaches back past the retained history.
+        """
+        if hours > self.retention_hours:
+            raise ValueError(f"Window of {hours}h exceeds the {self.retention_hours}h retention")
+        with self._lock:
+            if self.latest is None:
+                return 0, 0.0, np.empty(0, dtype=np.int64)
+            end = self.latest if end is None else int(end)
+            start = end - int(hours * 3600)
+            if start < self.latest - self.retention:
+                raise ValueError("Window starts before the retained history")
+            series = self._series.get(entity)
+            if series is None:
+                return 0, 0.0, np.empty(0, dtype=np.int64)
+            lo, hi = series.bounds(start, end)
+            return hi - lo, float(series.cum[hi] - series.cum[lo]), series.rows[lo:hi].copy()
+
+    def count(self, entity, hours, end=None):
+        return self.window(entity, hours, end)[0]
+
+    def amount(self, entity, hours, end=None):
+        return self.window(entity, hours, end)[1]
+
+    def velocity(self, entity, hours, end=None):
+        """Transactions per hour over the window."""
+        return self.count(entity, hours, end) / hours if hours else 0.0
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, entity):
+        return entity in self._series